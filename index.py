@@ -9,7 +9,7 @@ from app import app
 from app import server 
 
 # 导入每个页面的布局和回调逻辑
-from pages import homepage, detail_page
+import homepage, detail_page
 
 # 定义应用的主布局
 app.layout = html.Div([
@@ -0,0 +1,372 @@
+# ----------------------------------
+# 并发看板压力测试工具
+# ----------------------------------
+# 模拟 N 个浏览器同时打开看板，按真实前端的方式向 /_dash-update-component 发送回调请求：
+#   - 主页 (homepage.py): 定时器每次触发 update_homepage_cards
+#   - 详情页 (detail_page.py): 定时器触发状态卡片和产量图，并不时切换 天/周/月 时间范围
+# 最后按回调分别统计 p50/p99 延迟、吞吐量和错误率，用于评估一台服务器能承载多少看板。
+#
+# 和浏览器一样，定时器按固定时钟触发: 上一次请求还没返回时，下一次刷新照样发出，
+# 延迟从计划发送的时刻算起，因此服务器变慢时不会因为少发请求而低估延迟。
+#
+# 用法示例:
+#   python load_test.py --url http://服务器:8050 --viewers 20 --ticks 10  # 压测真实部署的服务器
+#   python load_test.py --serve --viewers 5 --ticks 2 --tick-interval 0   # 在本机单进程启动应用 (调试模式的模拟数据)，检查工具本身是否正常
+#
+# 注意: --serve 启动的只是单进程开发服务器，结果不能代表多 worker 的正式部署，
+# 只用于确认压测工具能跑通；评估需要多少 worker 时，必须用 --url 压测真实部署的服务器。
+#
+# 只依赖标准库，方便直接在服务器上运行。
+
+import argparse
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# --- 1. 回调定义 ---
+# 与 index.py / homepage.py / detail_page.py 中注册的回调保持一致
+HOMEPAGE_INTERVAL = 10 * 1000  # homepage.py 中 dcc.Interval 的 interval (毫秒)
+DETAIL_INTERVAL = 15 * 1000  # detail_page.py 中 dcc.Interval 的 interval (毫秒)
+TIME_RANGES = [1, 7, 30]  # detail_page.py 中 time-range-selector 的选项: 天/周/月
+BROWSER_CONNECTIONS = 6  # 浏览器对同一服务器最多同时保持的 HTTP/1.1 连接数
+
+# 每个回调所在页面的刷新间隔，用于判断 p99 延迟是否已经赶不上刷新
+# display_page 没有定时器，按最短的主页间隔计算
+CALLBACK_INTERVALS = {
+    'display_page': HOMEPAGE_INTERVAL,
+    'update_homepage_cards': HOMEPAGE_INTERVAL,
+    'update_detail_status_card': DETAIL_INTERVAL,
+    'update_production_chart': DETAIL_INTERVAL,
+}
+
+
+def build_payload(output_id, output_prop, inputs, state=(), changed=()):
+    # 按 Dash 前端的格式组装一次回调请求
+    # inputs / state 为 (组件id, 属性, 值) 的列表，changed 为触发本次回调的 "id.prop" 列表
+    return {
+        "output": f"{output_id}.{output_prop}",
+        "outputs": {"id": output_id, "property": output_prop},
+        "inputs": [{"id": i, "property": p, "value": v} for i, p, v in inputs],
+        "state": [{"id": i, "property": p, "value": v} for i, p, v in state],
+        "changedPropIds": list(changed),
+    }
+
+
+def display_page_payload(pathname):
+    # index.py 的路由回调: 每个看板打开时都会触发一次
+    return build_payload('page-content', 'children', [('url', 'pathname', pathname)], changed=['url.pathname'])
+
+
+def homepage_cards_payload(n):
+    return build_payload('homepage-cards-container', 'children',
+                         [('homepage-interval', 'n_intervals', n)],
+                         changed=['homepage-interval.n_intervals'])
+
+
+def detail_status_payload(n, machine_id):
+    return build_payload('detail-latest-status-card', 'children',
+                         [('detail-page-interval', 'n_intervals', n)],
+                         state=[('detail-page-machine-id', 'data', machine_id)],
+                         changed=['detail-page-interval.n_intervals'])
+
+
+def detail_chart_payload(n, time_range_days, machine_id, changed):
+    return build_payload('production-chart', 'figure',
+                         [('detail-page-interval', 'n_intervals', n), ('time-range-selector', 'value', time_range_days)],
+                         state=[('detail-page-machine-id', 'data', machine_id)],
+                         changed=[changed])
+
+
+# --- 2. 统计结果 ---
+class Stats:
+    # 线程安全地按回调名称记录每次请求的延迟和是否出错
+    # 成功和失败的请求分开记录，避免快速失败 (如连接被拒绝) 拉低延迟百分位数
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.error_latencies = {}
+        self.error_samples = {}
+        self.overlaps = {}
+
+    def record(self, name, latency, error=None):
+        with self.lock:
+            if error is None:
+                self.latencies.setdefault(name, []).append(latency)
+            else:
+                self.error_latencies.setdefault(name, []).append(latency)
+                self.error_samples.setdefault(name, error)
+
+    def record_overlap(self, name):
+        # 刷新触发时，同一看板上该回调的上一次请求还没有返回
+        with self.lock:
+            self.overlaps[name] = self.overlaps.get(name, 0) + 1
+
+    def summary(self, elapsed):
+        rows = []
+        with self.lock:
+            for name in sorted(set(self.latencies) | set(self.error_latencies) | set(self.overlaps)):
+                values = sorted(self.latencies.get(name, []))
+                error_values = sorted(self.error_latencies.get(name, []))
+                count = len(values) + len(error_values)
+                rows.append({
+                    "callback": name,
+                    "requests": count,
+                    "errors": len(error_values),
+                    "error_rate": len(error_values) / count if count else 0.0,
+                    "p50_ms": percentile(values, 50) * 1000,
+                    "p99_ms": percentile(values, 99) * 1000,
+                    "max_ms": values[-1] * 1000 if values else 0.0,
+                    "error_p50_ms": percentile(error_values, 50) * 1000,
+                    "throughput_rps": len(values) / elapsed if elapsed > 0 else 0.0,
+                    "overlapping_ticks": self.overlaps.get(name, 0),
+                    "first_error": self.error_samples.get(name),
+                })
+        return rows
+
+
+def percentile(sorted_values, pct):
+    # 最近秩法 (nearest-rank) 计算百分位数，输入必须已排序
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+# --- 3. 模拟一个看板用户 ---
+def post_callback(base_url, name, payload, stats, timeout, scheduled=None):
+    # 发送一次回调请求并记录耗时；2xx (包括 PreventUpdate 的 204) 视为成功
+    # scheduled 为计划发送的时刻 (time.perf_counter())，排队等待连接的时间也计入延迟
+    body = json.dumps(payload).encode('utf-8')
+    request = urllib.request.Request(f"{base_url}/_dash-update-component", data=body,
+                                     headers={"Content-Type": "application/json"}, method="POST")
+    start = time.perf_counter() if scheduled is None else scheduled
+    error = None
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+    except urllib.error.HTTPError as e:
+        error = f"HTTP {e.code}"
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    stats.record(name, time.perf_counter() - start, error)
+
+
+def build_schedule(page, ticks, tick_interval, switch_probability, rng):
+    # 生成一个看板的事件时间表，返回按时间排序的 (相对页面加载的秒数, 'tick' 或 'switch') 列表
+    # 第 n 次刷新固定在 n * tick_interval 触发 (n == 0 为页面加载时的首次回调)
+    # 详情页在每个刷新间隔内以 switch_probability 的概率，在随机时刻切换一次 天/周/月
+    events = [(n * tick_interval, 0, 'tick') for n in range(ticks + 1)]
+    if page != '/':
+        for k in range(1, ticks + 1):
+            if rng.random() < switch_probability:
+                events.append((rng.uniform((k - 1) * tick_interval, k * tick_interval), 1, 'switch'))
+    events.sort()
+    return [(offset, kind) for offset, _, kind in events]
+
+
+def run_viewer(viewer_id, page, args, stats, stop_event):
+    # page 为 '/' (主页) 或 '/machineX' (详情页)
+    # 每个看板先随机等待一段时间再打开，避免所有用户在同一时刻刷新
+    rng = random.Random(args.seed + viewer_id)
+    tick_interval = args.tick_interval
+    if tick_interval is None:
+        tick_interval = (HOMEPAGE_INTERVAL if page == '/' else DETAIL_INTERVAL) / 1000.0
+    if stop_event.wait(rng.uniform(0, tick_interval) if args.stagger else 0):
+        return
+
+    # 页面布局返回后各回调才会首次触发，所以路由回调同步发送
+    post_callback(args.url, 'display_page', display_page_payload(page), stats, args.timeout)
+
+    # 之后的请求交给连接池异步发送，定时器不会因为请求未返回而推迟
+    pool = ThreadPoolExecutor(max_workers=BROWSER_CONNECTIONS)
+    lock = threading.Lock()
+    in_flight = {}
+
+    def finish(name, payload, scheduled):
+        try:
+            post_callback(args.url, name, payload, stats, args.timeout, scheduled)
+        finally:
+            with lock:
+                in_flight[name] -= 1
+
+    def send(name, payload, scheduled):
+        with lock:
+            if in_flight.get(name):
+                stats.record_overlap(name)
+            in_flight[name] = in_flight.get(name, 0) + 1
+        pool.submit(finish, name, payload, scheduled)
+
+    machine_id = page[1:]
+    time_range = TIME_RANGES[0]
+    n = -1
+    t0 = time.perf_counter()
+    for offset, kind in build_schedule(page, args.ticks, tick_interval, args.switch_probability, rng):
+        scheduled = t0 + offset
+        if stop_event.wait(max(0.0, scheduled - time.perf_counter())):
+            break
+        if kind == 'tick':
+            n += 1
+            if page == '/':
+                send('update_homepage_cards', homepage_cards_payload(n), scheduled)
+            else:
+                # 两个回调都依赖 detail-page-interval.n_intervals，浏览器会同时发出
+                send('update_detail_status_card', detail_status_payload(n, machine_id), scheduled)
+                send('update_production_chart', detail_chart_payload(n, time_range, machine_id, 'detail-page-interval.n_intervals'), scheduled)
+        else:
+            time_range = rng.choice([r for r in TIME_RANGES if r != time_range])
+            send('update_production_chart', detail_chart_payload(n, time_range, machine_id, 'time-range-selector.value'), scheduled)
+    pool.shutdown(wait=True)
+
+
+# --- 4. 在本机启动应用 ---
+# 在子进程中导入 index.py 注册所有回调并启动服务器，避免与压测线程争用同一个 GIL
+SERVE_SCRIPT = """
+import logging, sys
+from werkzeug.serving import make_server
+import index
+logging.getLogger('werkzeug').setLevel(logging.ERROR)
+make_server('127.0.0.1', int(sys.argv[1]), index.server, threaded=True).serve_forever()
+"""
+
+
+def start_local_server(port, timeout=60):
+    # 调试模式下 data_handler.get_machine_list() 会先生成模拟数据
+    import data_handler
+
+    machine_ids = data_handler.get_machine_list()
+    proc = subprocess.Popen([sys.executable, '-c', SERVE_SCRIPT, str(port)],
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    deadline = time.time() + timeout
+    while True:
+        if proc.poll() is not None:
+            raise RuntimeError(f"本地服务器启动失败，退出码 {proc.returncode}")
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return proc, machine_ids
+        except OSError:
+            if time.time() > deadline:
+                proc.terminate()
+                raise RuntimeError(f"等待本地服务器监听端口 {port} 超时")
+            time.sleep(0.2)
+
+
+def print_report(rows, elapsed, viewers):
+    print(f"\n=== 压测结果: {viewers} 个看板, 用时 {elapsed:.1f} 秒 ===")
+    print("(延迟只统计成功的请求，从计划发送时刻算起；吞吐量为每秒成功的请求数)")
+    header = (f"{'回调':<28}{'请求数':>8}{'错误率':>9}{'p50(ms)':>10}{'p99(ms)':>10}{'max(ms)':>10}"
+              f"{'吞吐(req/s)':>13}{'重叠刷新':>10}")
+    print(header)
+    print("-" * len(header))
+    total = errors = 0
+    for row in rows:
+        total += row['requests']
+        errors += row['errors']
+        print(f"{row['callback']:<28}{row['requests']:>8}{row['error_rate']:>9.1%}{row['p50_ms']:>10.1f}"
+              f"{row['p99_ms']:>10.1f}{row['max_ms']:>10.1f}{row['throughput_rps']:>13.2f}{row['overlapping_ticks']:>10}")
+    print("-" * len(header))
+    ok_rps = (total - errors) / elapsed if elapsed > 0 else 0
+    print(f"总计: {total} 次请求, {errors} 次错误, 吞吐量 {ok_rps:.2f} req/s")
+    for row in rows:
+        if row['first_error']:
+            print(f"  {row['callback']} 的首个错误: {row['first_error']} (失败请求 p50 {row['error_p50_ms']:.1f} ms)")
+    for row in rows:
+        interval = CALLBACK_INTERVALS.get(row['callback'], HOMEPAGE_INTERVAL)
+        if row['p99_ms'] > interval:
+            print(f"警告: {row['callback']} 的 p99 延迟 {row['p99_ms']:.0f} ms 已超过所在页面 {interval // 1000} 秒的刷新间隔")
+        if row['overlapping_ticks']:
+            print(f"警告: {row['callback']} 有 {row['overlapping_ticks']} 次刷新触发时上一次请求仍未返回")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="模拟多个看板同时刷新，测量 Dash 回调的延迟、吞吐量和错误率")
+    parser.add_argument('--url', default=None, help="被测服务器地址 (默认 http://127.0.0.1:8050)")
+    parser.add_argument('--serve', action='store_true',
+                        help="在本机子进程中启动单进程的 index.py 应用再压测，只用于检查工具本身，不能用来评估 worker 数量")
+    parser.add_argument('--port', type=int, default=8050, help="--serve 时监听的端口")
+    parser.add_argument('--viewers', type=int, default=10, help="同时打开的看板数量")
+    parser.add_argument('--homepage-ratio', type=float, default=0.5, help="打开主页的看板比例 (0 到 1)，其余打开详情页")
+    parser.add_argument('--machines', nargs='*', default=None, help="详情页使用的设备ID (默认 machine1 machine2 machine3)")
+    parser.add_argument('--ticks', type=int, default=5, help="每个看板的定时刷新次数 (不含页面加载时的首次回调)")
+    parser.add_argument('--tick-interval', type=float, default=None,
+                        help="刷新间隔 (秒)，默认与页面中的 dcc.Interval 一致；设为 0 则全速压测")
+    parser.add_argument('--switch-probability', type=float, default=0.2,
+                        help="详情页在每个刷新间隔内随机切换一次时间范围的概率 (0 到 1)")
+    parser.add_argument('--no-stagger', dest='stagger', action='store_false', help="所有看板同时打开，不随机错开")
+    parser.add_argument('--timeout', type=float, default=30.0, help="单次请求超时 (秒)")
+    parser.add_argument('--seed', type=int, default=0, help="随机种子，便于重复对比")
+    parser.add_argument('--json', dest='json_path', default=None, help="将结果另存为 JSON 文件")
+    args = parser.parse_args(argv)
+    if args.viewers < 1:
+        parser.error("--viewers 至少为 1")
+    if not 0 <= args.homepage_ratio <= 1:
+        parser.error("--homepage-ratio 必须在 0 到 1 之间")
+    if args.ticks < 0:
+        parser.error("--ticks 不能为负数")
+    if args.tick_interval is not None and args.tick_interval < 0:
+        parser.error("--tick-interval 不能为负数")
+    if not 0 <= args.switch_probability <= 1:
+        parser.error("--switch-probability 必须在 0 到 1 之间")
+    if args.timeout <= 0:
+        parser.error("--timeout 必须大于 0")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server_proc = None
+    machine_ids = args.machines
+    if args.serve:
+        try:
+            server_proc, found = start_local_server(args.port)
+        except RuntimeError as e:
+            print(f"错误: {e}")
+            return
+        machine_ids = machine_ids or found
+        args.url = args.url or f"http://127.0.0.1:{args.port}"
+        print("提示: --serve 只用于检查压测工具，评估 worker 数量请用 --url 压测真实部署的服务器。")
+    args.url = (args.url or "http://127.0.0.1:8050").rstrip('/')
+    machine_ids = machine_ids or ["machine1", "machine2", "machine3"]
+
+    # 按比例分配主页和详情页，详情页轮流使用各个设备
+    homepage_viewers = int(round(args.viewers * args.homepage_ratio))
+    pages = ['/'] * homepage_viewers
+    pages += [f"/{machine_ids[i % len(machine_ids)]}" for i in range(args.viewers - homepage_viewers)]
+
+    print(f"压测目标: {args.url}，{args.viewers} 个看板 (主页 {homepage_viewers} / 详情页 {len(pages) - homepage_viewers})，每个刷新 {args.ticks} 次")
+    stats = Stats()
+    stop_event = threading.Event()
+    threads = [threading.Thread(target=run_viewer, args=(i, page, args, stats, stop_event), daemon=True)
+               for i, page in enumerate(pages)]
+    start = time.perf_counter()
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    except KeyboardInterrupt:
+        print("\n已中断，正在汇总已完成的请求...")
+        stop_event.set()
+    elapsed = time.perf_counter() - start
+
+    rows = stats.summary(elapsed)
+    print_report(rows, elapsed, args.viewers)
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump({"url": args.url, "viewers": args.viewers, "elapsed_s": elapsed, "callbacks": rows}, f, ensure_ascii=False, indent=2)
+    if server_proc is not None:
+        server_proc.terminate()
+        server_proc.wait()
+
+
+if __name__ == '__main__':
+    main()
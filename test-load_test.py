@@ -0,0 +1,229 @@
+# ----------------------------------
+# load_test.py 的自检脚本
+# ----------------------------------
+# 直接运行: python test-load_test.py
+# 1. 检查百分位数和统计结果的计算 (只依赖标准库)
+# 2. 对本地的模拟 HTTP 服务器运行 run_viewer，检查请求数、错误统计和固定时钟的调度 (只依赖标准库)
+# 3. 检查压测发送的回调请求与 homepage.py / detail_page.py / index.py 中注册的回调一致 (需要安装 dash)
+
+import argparse
+import contextlib
+import http.server
+import io
+import json
+import random
+import threading
+import time
+
+import load_test
+
+
+# --- 1. 百分位数与统计 ---
+def check_percentile():
+    values = list(range(1, 101))  # 1..100
+    assert load_test.percentile(values, 50) == 50
+    assert load_test.percentile(values, 99) == 99
+    assert load_test.percentile(values, 100) == 100
+
+    values = list(range(1, 11))  # 1..10，最近秩法下 p99 取最大值
+    assert load_test.percentile(values, 50) == 5
+    assert load_test.percentile(values, 99) == 10
+
+    assert load_test.percentile([7], 50) == 7
+    assert load_test.percentile([7], 99) == 7
+    assert load_test.percentile([], 50) == 0.0
+    assert load_test.percentile([], 99) == 0.0
+
+
+def check_stats_summary():
+    stats = load_test.Stats()
+    for latency in [0.3, 0.1, 0.2, 0.4]:
+        stats.record('update_homepage_cards', latency)
+    stats.record('update_homepage_cards', 0.5, error="HTTP 500")
+    stats.record('display_page', 0.05)
+
+    rows = {row['callback']: row for row in stats.summary(elapsed=2.0)}
+    row = rows['update_homepage_cards']
+    assert row['requests'] == 5
+    assert row['errors'] == 1
+    assert abs(row['error_rate'] - 0.2) < 1e-9
+    # 延迟和吞吐量只统计 4 次成功的请求
+    assert abs(row['p50_ms'] - 200) < 1e-6
+    assert abs(row['p99_ms'] - 400) < 1e-6
+    assert abs(row['max_ms'] - 400) < 1e-6
+    assert abs(row['error_p50_ms'] - 500) < 1e-6
+    assert abs(row['throughput_rps'] - 2.0) < 1e-9
+    assert row['first_error'] == "HTTP 500"
+
+    assert rows['display_page']['errors'] == 0
+    assert rows['display_page']['first_error'] is None
+
+
+def check_errors_do_not_skew_latency():
+    # 快速失败 (例如连接被拒绝) 不能拉低成功请求的延迟百分位数
+    stats = load_test.Stats()
+    for latency in [1.0, 2.0, 3.0]:
+        stats.record('update_production_chart', latency)
+    before = stats.summary(elapsed=1.0)[0]
+    for _ in range(10):
+        stats.record('update_production_chart', 0.0, error="ConnectionRefusedError")
+    after = stats.summary(elapsed=1.0)[0]
+    assert after['p50_ms'] == before['p50_ms'] == 2000
+    assert after['p99_ms'] == before['p99_ms'] == 3000
+    assert after['requests'] == 13 and after['errors'] == 10
+    assert after['error_p50_ms'] == 0.0
+
+
+def check_parse_args():
+    for argv in (['--viewers', '0'], ['--homepage-ratio', '1.5'], ['--homepage-ratio', '-0.1'],
+                 ['--ticks', '-1'], ['--tick-interval', '-1'], ['--switch-probability', '2']):
+        try:
+            with contextlib.redirect_stderr(io.StringIO()):
+                load_test.parse_args(argv)
+        except SystemExit:
+            continue
+        raise AssertionError(f"参数未被拒绝: {argv}")
+    args = load_test.parse_args(['--viewers', '3', '--homepage-ratio', '1', '--tick-interval', '0'])
+    assert args.viewers == 3 and args.tick_interval == 0
+
+
+# --- 2. 对模拟服务器运行 run_viewer ---
+def check_schedule():
+    schedule = load_test.build_schedule('/machine1', 4, 10.0, 1.0, random.Random(0))
+    ticks = [offset for offset, kind in schedule if kind == 'tick']
+    switches = [offset for offset, kind in schedule if kind == 'switch']
+    assert ticks == [0.0, 10.0, 20.0, 30.0, 40.0]
+    # 每个刷新间隔内各有一次切换，时刻随机而不是紧跟在刷新之后
+    assert len(switches) == 4
+    assert all((k - 1) * 10.0 <= t <= k * 10.0 for k, t in enumerate(switches, 1))
+    assert [offset for offset, _ in schedule] == sorted(offset for offset, _ in schedule)
+
+    assert not [kind for _, kind in load_test.build_schedule('/', 4, 10.0, 1.0, random.Random(0)) if kind == 'switch']
+    assert not [kind for _, kind in load_test.build_schedule('/machine1', 4, 10.0, 0.0, random.Random(0)) if kind == 'switch']
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    # 按 output 记录收到的回调请求；fail 中的 output 返回 500，delays 中的 output 先等待一段时间再返回
+    fail = set()
+    delays = {}
+    received = []
+    lock = threading.Lock()
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        output = payload['output']
+        with self.lock:
+            self.received.append((time.perf_counter(), output, payload['changedPropIds']))
+        time.sleep(self.delays.get(output, 0))
+        self.send_response(500 if output in self.fail else 200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, *args):
+        pass
+
+
+def run_against_stub(page, ticks, tick_interval, switch_probability=0.0, fail=(), delays=None):
+    StubHandler.fail = set(fail)
+    StubHandler.delays = delays or {}
+    StubHandler.received = []
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    args = argparse.Namespace(url=f"http://127.0.0.1:{server.server_address[1]}", ticks=ticks,
+                              tick_interval=tick_interval, switch_probability=switch_probability,
+                              stagger=False, seed=0, timeout=5.0)
+    stats = load_test.Stats()
+    start = time.perf_counter()
+    load_test.run_viewer(0, page, args, stats, threading.Event())
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    server.server_close()
+    return {row['callback']: row for row in stats.summary(elapsed)}, elapsed, list(StubHandler.received)
+
+
+def check_request_counts():
+    rows, _, _ = run_against_stub('/', ticks=3, tick_interval=0)
+    assert rows['display_page']['requests'] == 1
+    assert rows['update_homepage_cards']['requests'] == 4  # 首次回调 + 3 次刷新
+    assert rows['update_homepage_cards']['errors'] == 0
+
+    rows, _, received = run_against_stub('/machine1', ticks=3, tick_interval=0, switch_probability=1.0)
+    assert rows['update_detail_status_card']['requests'] == 4
+    assert rows['update_production_chart']['requests'] == 4 + 3  # 每次刷新一次 + 每个间隔切换一次
+    switches = [r for r in received if r[2] == ['time-range-selector.value']]
+    assert len(switches) == 3
+
+
+def check_errors_counted():
+    rows, _, _ = run_against_stub('/', ticks=2, tick_interval=0, fail={'homepage-cards-container.children'})
+    row = rows['update_homepage_cards']
+    assert row['requests'] == 3 and row['errors'] == 3 and row['error_rate'] == 1.0
+    assert row['first_error'] == "HTTP 500"
+    assert row['p50_ms'] == 0.0  # 没有成功的请求，不应有成功延迟
+    assert rows['display_page']['errors'] == 0
+
+
+def check_fixed_clock():
+    # 状态卡片每次要 0.3 秒，刷新间隔 0.1 秒: 刷新必须按时发出，不能等上一次请求返回
+    delay, interval, ticks = 0.3, 0.1, 3
+    rows, elapsed, received = run_against_stub('/machine1', ticks=ticks, tick_interval=interval,
+                                               delays={'detail-latest-status-card.children': delay})
+    status = [t for t, output, _ in received if output == 'detail-latest-status-card.children']
+    chart = [t for t, output, _ in received if output == 'production-chart.figure']
+    assert len(status) == len(chart) == ticks + 1
+    # 最后一次刷新在 ticks * interval 时发出，而不是在 (ticks + 1) * delay 之后
+    assert status[-1] - status[0] < ticks * interval + 0.15, status
+    assert elapsed < ticks * interval + delay + 0.5, elapsed
+    # 同一次刷新的两个回调同时发出，图表不必等状态卡片返回
+    assert all(abs(c - s) < delay / 2 for s, c in zip(status, chart))
+    # 刷新触发时上一次状态卡片请求仍未返回，需要被记录
+    assert rows['update_detail_status_card']['overlapping_ticks'] >= ticks - 1
+    assert rows['update_production_chart']['overlapping_ticks'] == 0
+    # 延迟从计划发送时刻算起，至少包含服务器的处理时间
+    assert rows['update_detail_status_card']['p50_ms'] >= delay * 1000
+
+
+# --- 3. 回调请求与注册的回调一致 ---
+def check_payloads_match_callbacks():
+    import index  # 注册 index.py / homepage.py / detail_page.py 中的全部回调
+    from app import app
+
+    payloads = {
+        'display_page': load_test.display_page_payload('/'),
+        'update_homepage_cards': load_test.homepage_cards_payload(0),
+        'update_detail_status_card': load_test.detail_status_payload(0, 'machine1'),
+        'update_production_chart': load_test.detail_chart_payload(0, 1, 'machine1', 'time-range-selector.value'),
+    }
+    registered = {spec['callback'].__name__: (output, spec) for output, spec in app.callback_map.items()}
+    assert set(payloads) == set(registered), f"回调列表不一致: {sorted(registered)}"
+    assert set(load_test.CALLBACK_INTERVALS) == set(registered)
+
+    for name, payload in payloads.items():
+        output, spec = registered[name]
+        strip = lambda items: [{'id': item['id'], 'property': item['property']} for item in items]
+        assert payload['output'] == output, name
+        assert strip(payload['inputs']) == strip(spec['inputs']), name
+        assert strip(payload['state']) == strip(spec['state']), name
+        inputs = {f"{item['id']}.{item['property']}" for item in spec['inputs']}
+        assert set(payload['changedPropIds']) <= inputs, name
+
+
+if __name__ == '__main__':
+    check_percentile()
+    check_stats_summary()
+    check_errors_do_not_skew_latency()
+    check_parse_args()
+    print("百分位数与统计检查通过。")
+    check_schedule()
+    check_request_counts()
+    check_errors_counted()
+    check_fixed_clock()
+    print("模拟服务器压测检查通过。")
+    try:
+        import dash  # noqa: F401
+    except ImportError:
+        print("未安装 dash，跳过回调一致性检查。")
+    else:
+        check_payloads_match_callbacks()
+        print("回调请求一致性检查通过。")